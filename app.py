@@ -1,49 +1,59 @@
+import sys
+from collections import deque
+
 import streamlit as st
 from src.blockchain_utils.credentials import get_client, get_account_credentials, get_indexer
+from src.blockchain_utils.network_interaction import TransactionNotConfirmedError
 from src.services.game_engine_service import GameEngineService
 import algosdk
+from algosdk.error import AlgodHTTPError
 
-client = get_client()
-indexer = get_indexer()
-
-acc_pk, acc_address = algosdk.account.generate_account()
-player_x_pk, player_x_address = algosdk.account.generate_account()
-player_o_pk, player_o_address = algosdk.account.generate_account()
+# Only the most recent transactions are kept in the session and rendered.
+MAX_DISPLAYED_TRANSACTIONS = 50
 
-if "submitted_transactions" not in st.session_state:
-    st.session_state.submitted_transactions = []
 
-if "player_turn" not in st.session_state:
-    st.session_state.player_turn = "X"
+@st.experimental_singleton
+def _client():
+    return get_client()
 
-if "game_state" not in st.session_state:
-    st.session_state.game_state = ['-'] * 9
 
-if "x_state" not in st.session_state:
-    st.session_state.x_state = 0
+@st.experimental_singleton
+def _indexer():
+    return get_indexer()
 
-if "o_state" not in st.session_state:
-    st.session_state.o_state = 0
 
-if "game_state" not in st.session_state:
-    st.session_state.game_state = ['-'] * 9
+client = _client()
+indexer = _indexer()
 
-if "game_engine" not in st.session_state:
-    st.session_state.game_engine = GameEngineService(app_creator_pk=acc_pk,
-                                                     app_creator_address=acc_address,
-                                                     player_x_pk=player_x_pk,
-                                                     player_x_address=player_x_address,
-                                                     player_o_pk=player_o_pk,
-                                                     player_o_address=player_o_address)
+if "is_initialized" not in st.session_state:
+    accounts = (algosdk.account.generate_account(),
+                algosdk.account.generate_account(),
+                algosdk.account.generate_account())
+    (acc_pk, acc_address), (player_x_pk, player_x_address), (player_o_pk, player_o_address) = accounts
 
-if "game_status" not in st.session_state:
-    st.session_state.game_status = 0
+    st.session_state.update({
+        "accounts": accounts,
+        "game_engine": GameEngineService(app_creator_pk=acc_pk,
+                                         app_creator_address=acc_address,
+                                         player_x_pk=player_x_pk,
+                                         player_x_address=player_x_address,
+                                         player_o_pk=player_o_pk,
+                                         player_o_address=player_o_address),
+        "submitted_transactions": deque(maxlen=MAX_DISPLAYED_TRANSACTIONS),
+        "player_turn": "X",
+        "game_state": ['-'] * 9,
+        "x_state": 0,
+        "o_state": 0,
+        "game_status": 0,
+        "is_app_deployed": False,
+        "is_game_started": False,
+        "is_initialized": True
+    })
 
-if "is_app_deployed" not in st.session_state:
-    st.session_state.is_app_deployed = False
+(acc_pk, acc_address), (player_x_pk, player_x_address), (player_o_pk, player_o_address) = \
+    st.session_state.accounts
 
-if "is_game_started" not in st.session_state:
-    st.session_state.is_game_started = False
+game_engine = st.session_state.game_engine
 
 st.title("Addresses")
 st.write(f"app_creator: {acc_address}")
@@ -59,7 +69,7 @@ def deploy_application():
     if st.session_state.is_app_deployed:
         return
 
-    app_deployment_txn_log = st.session_state.game_engine.deploy_application(client)
+    app_deployment_txn_log = game_engine.deploy_application(client)
     st.session_state.submitted_transactions.append(app_deployment_txn_log)
     st.session_state.is_app_deployed = True
 
@@ -68,7 +78,7 @@ st.title("Step 1: App deployment")
 st.write("In this step we deploy the Tic-Tac-Toe Stateful Smart Contract to the Algorand TestNetwork")
 
 if st.session_state.is_app_deployed:
-    st.success(f"The app is deployed on TestNet with the following app_id: {st.session_state.game_engine.app_id}")
+    st.success(f"The app is deployed on TestNet with the following app_id: {game_engine.app_id}")
 else:
     st.error(f"The app is not deployed! Press the button below to deploy the application.")
     _ = st.button("Deploy App", on_click=deploy_application)
@@ -82,7 +92,7 @@ def start_game():
     if st.session_state.is_game_started:
         return
 
-    start_game_txn_log = st.session_state.game_engine.start_game(client)
+    start_game_txn_log = game_engine.start_game(client)
     st.session_state.submitted_transactions.append(start_game_txn_log)
     st.session_state.is_game_started = True
 
@@ -105,27 +115,52 @@ mark_position_idx = st.number_input(f'Action position',
                                     step=1)
 
 
+# Base64 encoded global state key of the GameStatus variable.
+GAME_STATUS_KEY = sys.intern("Uw==")
+
+# Streamlit element used to render each board cell.
+_CELL_RENDERERS = {'-': 'info', 'X': 'warning', 'O': 'success'}
+
+# 9-bit binary representations of every possible player state.
+_BIN9 = tuple(f"{i:09b}" for i in range(512))
+
+
 def to_binary(integer):
-    return format(integer, 'b').zfill(9)
+    return _BIN9[integer]
+
+
+@st.experimental_memo(ttl=3)
+def _search_application(app_id):
+    return indexer.search_applications(application_id=app_id)
 
 
-def get_game_status(indexer, app_id):
-    response = indexer.search_applications(application_id=app_id)
-    game_status_key = "R2FtZVN0YXRl"
+def _parse_global_state(response):
+    return {global_variable['key']: global_variable['value']
+            for global_variable in response['applications'][0]['params']['global-state']}
 
-    for global_variable in response['applications'][0]['params']['global-state']:
-        if global_variable['key'] == game_status_key:
-            return global_variable['value']['uint']
+
+def get_game_status(app_id):
+    global_state = _parse_global_state(_search_application(app_id))
+    return global_state[GAME_STATUS_KEY]['uint']
+
+
+def reject_action(action_idx):
+    st.session_state.submitted_transactions.append(f"Rejected transaction. Tried to put "
+                                                   f"{st.session_state.player_turn} at {action_idx}")
 
 
 def play_action(action_idx):
+    # Moves that the smart contract would reject anyway are filtered out before any transaction is sent.
+    if not 0 <= action_idx <= 8 or st.session_state.game_state[action_idx] != '-':
+        reject_action(action_idx)
+        return
+
     try:
-        play_action_txn = st.session_state.game_engine.play_action(client,
-                                                                   player_id=st.session_state.player_turn,
-                                                                   action_position=action_idx)
-    except:
-        st.session_state.submitted_transactions.append(f"Rejected transaction. Tried to put "
-                                                       f"{st.session_state.player_turn} at {action_idx}")
+        play_action_txn = game_engine.play_action(client,
+                                                  player_id=st.session_state.player_turn,
+                                                  action_position=action_idx)
+    except (AlgodHTTPError, TransactionNotConfirmedError, ValueError):
+        reject_action(action_idx)
         return
 
     st.session_state.game_state[action_idx] = st.session_state.player_turn
@@ -146,17 +181,15 @@ st.title("Game state")
 for i in range(3):
     cols = st.columns(3)
     for j in range(3):
-        idx = i * 3 + j
-        if st.session_state.game_state[idx] == '-':
-            cols[j].info('-')
-        elif st.session_state.game_state[idx] == 'X':
-            cols[j].warning('X')
-        else:
-            cols[j].success('O')
+        cell = st.session_state.game_state[i * 3 + j]
+        getattr(cols[j], _CELL_RENDERERS[cell])(cell)
+
+x_state, o_state = st.session_state.x_state, st.session_state.o_state
+x_bin, o_bin = to_binary(x_state), to_binary(o_state)
 
 st.subheader("Binary states")
-st.write(f"x_state: {st.session_state.x_state} == {to_binary(st.session_state.x_state)}")
-st.write(f"o_state: {st.session_state.o_state} == {to_binary(st.session_state.o_state)}")
+st.write(f"x_state: {x_state} == {x_bin}")
+st.write(f"o_state: {o_state} == {o_bin}")
 
 # Step 4:
 
@@ -165,7 +198,7 @@ st.title("Step 4: Withdraw funds")
 
 def check_game_status():
     if st.session_state.is_game_started:
-        game_status = get_game_status(indexer, app_id=st.session_state.game_engine.app_id)
+        game_status = get_game_status(app_id=game_engine.app_id)
         st.session_state.game_status = game_status
 
 
@@ -174,24 +207,12 @@ _ = st.button("Check the game status", on_click=check_game_status)
 
 
 def withdraw_funds(winner):
-    if winner is None:
-        try:
-            fund_escrow_txn = st.session_state.game_engine.fund_escrow(client=client)
-            st.session_state.submitted_transactions.append(fund_escrow_txn)
-
-            txn_description = st.session_state.game_engine.tie_money_refund(client)
-            st.session_state.submitted_transactions.append(txn_description)
-        except:
-            st.session_state.submitted_transactions.append("Rejected transaction. Unsuccessful withdrawal.")
-    else:
-        try:
-            fund_escrow_txn = st.session_state.game_engine.fund_escrow(client=client)
-            st.session_state.submitted_transactions.append(fund_escrow_txn)
-
-            txn_description = st.session_state.game_engine.win_money_refund(client, player_id=winner)
-            st.session_state.submitted_transactions.append(txn_description)
-        except:
-            st.session_state.submitted_transactions.append("Rejected transaction. Unsuccessful withdrawal.")
+    try:
+        game_engine.fund_and_refund(client,
+                                    player_id=winner,
+                                    txn_logs=st.session_state.submitted_transactions)
+    except (AlgodHTTPError, TransactionNotConfirmedError, ValueError):
+        st.session_state.submitted_transactions.append("Rejected transaction. Unsuccessful withdrawal.")
 
 
 if st.session_state.game_status == 0:
@@ -1,21 +1,4 @@
-from src.blockchain_utils.credentials import get_client, get_account_credentials
-from src.services.game_engine_service import GameEngineService
-
-client = get_client()
-
-acc_pk, acc_address, _ = get_account_credentials(account_id=3)
-player_x_pk, player_x_address, _ = get_account_credentials(account_id=1)
-player_o_pk, player_o_address, _ = get_account_credentials(account_id=2)
-
-game_engine = GameEngineService(app_creator_pk=acc_pk,
-                                app_creator_address=acc_address,
-                                player_x_pk=player_x_pk,
-                                player_x_address=player_x_address,
-                                player_o_pk=player_o_pk,
-                                player_o_address=player_o_address)
-
-game_engine.deploy_application(client=client)
-game_engine.start_game(client=client)
+from src.scenarios.runner import run_scenario
 
 game_actions = [
     ("X", 0),
@@ -27,13 +10,7 @@ game_actions = [
     ("X", 6),
 ]
 
-for player_id, action_position in game_actions:
-    game_engine.play_action(client=client,
-                            player_id=player_id,
-                            action_position=action_position)
-
-
-game_engine.fund_escrow(client=client)
-game_engine.win_money_refund(client=client,
-                             player_id="X")
-
+run_scenario(app_creator_id=3,
+             game_actions=game_actions,
+             finish_game=lambda game_engine, client: game_engine.win_money_refund(client=client,
+                                                                                  player_id="X"))
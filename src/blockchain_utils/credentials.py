@@ -2,7 +2,9 @@ from algosdk.v2client import algod
 from algosdk.v2client import indexer
 from algosdk import account as algo_acc
 import yaml
+import functools
 import os
+from dataclasses import dataclass
 from pathlib import Path
 from algosdk import mnemonic
 
@@ -12,7 +14,13 @@ def get_project_root_path() -> Path:
     return path.parent.parent
 
 
+@functools.lru_cache(maxsize=None)
 def load_config():
+    """
+    Loads the config.yml file. The file is parsed once per process since the client and all the accounts are read from
+    it.
+    :return:
+    """
     root_path = get_project_root_path()
     config_location = os.path.join(root_path, 'config.yml')
 
@@ -20,8 +28,10 @@ def load_config():
         return yaml.full_load(file)
 
 
+@functools.lru_cache(maxsize=None)
 def get_client():
     """
+    The client is created once per process and shared by all the callers.
     :return:
         Returns algod_client
     """
@@ -35,6 +45,7 @@ def get_client():
     return algod_client
 
 
+@functools.lru_cache(maxsize=None)
 def get_indexer():
     config = load_config()
 
@@ -47,17 +58,40 @@ def get_indexer():
     return my_indexer
 
 
-def get_account_credentials(account_id: int) -> (str, str, str):
+@dataclass(frozen=True)
+class Account:
     """
-    Gets the credentials for the account with number: account_id
+    Credentials of an account from the config file.
+    """
+    private_key: str
+    address: str
+    mnemonic: str
+
+
+@functools.lru_cache(maxsize=32)
+def get_account(account_id: int) -> Account:
+    """
+    Gets the account with number: account_id. The account is created once per process and shared by all the callers.
     :param account_id: Number of the account for which we want the credentials
-    :return: (str, str, str) private key, address and mnemonic
+    :return:
     """
     config = load_config()
     account_name = f"account_{account_id}"
 
     account = config.get("accounts").get(account_name)
-    return account.get("private_key"), account.get("address"), account.get("mnemonic")
+    return Account(private_key=account.get("private_key"),
+                   address=account.get("address"),
+                   mnemonic=account.get("mnemonic"))
+
+
+def get_account_credentials(account_id: int) -> (str, str, str):
+    """
+    Gets the credentials for the account with number: account_id
+    :param account_id: Number of the account for which we want the credentials
+    :return: (str, str, str) private key, address and mnemonic
+    """
+    account = get_account(account_id)
+    return account.private_key, account.address, account.mnemonic
 
 
 def add_account_to_config():
@@ -89,3 +123,6 @@ def add_account_to_config():
 
     with open(config_location, 'w') as file:
         yaml.safe_dump(cur_yaml, file)
+
+    load_config.cache_clear()
+    get_account.cache_clear()
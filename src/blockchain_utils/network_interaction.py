@@ -1,11 +1,39 @@
 import base64
-from typing import Optional
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
 
-from algosdk.future.transaction import SignedTransaction
+from algosdk.future import transaction as algo_txn
+from algosdk.future.transaction import SignedTransaction, Transaction
 from algosdk.v2client import algod
 
+from src.blockchain_utils.credentials import get_project_root_path
+
+TEAL_CACHE_PATH = os.path.join(get_project_root_path(), '.teal_cache')
+
+
+def write_cache_file(path: Path, data: bytes):
+    """
+    Writes the data to a file of the on-disk cache. The data is written to a temporary file that is unique for every
+    writer first and then moved in place, so concurrent readers never see a partially written file and concurrent
+    writers of the same entry do not interfere with each other.
+    :param path:
+    :param data:
+    :return:
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False) as tmp_file:
+        tmp_file.write(data)
+    os.replace(tmp_file.name, path)
+
 
 class NetworkInteraction:
+    # Compiled programs keyed by their TEAL source. Compilation is deterministic so the result can be reused.
+    _compiled_programs = {}
 
     @staticmethod
     def wait_for_confirmation(client: algod.AlgodClient, txid, log=True):
@@ -68,12 +96,185 @@ class NetworkInteraction:
         return txid
 
     @staticmethod
-    def compile_program(client: algod.AlgodClient, source_code):
+    def submit_transaction_async(client: algod.AlgodClient, transaction: SignedTransaction) -> str:
+        """
+        Sends the transaction to the network without waiting for its confirmation.
+        :param client:
+        :param transaction:
+        :return:
+            The id of the submitted transaction.
+        """
+        return client.send_transaction(transaction)
+
+    @staticmethod
+    def submit_atomic_group(client: algod.AlgodClient,
+                            transactions: List[Tuple[Transaction, Union[str, algo_txn.LogicSig]]]) -> str:
+        """
+        Groups the transactions into an Atomic Transfer, signs each of them with its signer and submits the whole group
+        in a single request.
+        :param client:
+        :param transactions: list of (transaction, signer) pairs in the order of the group. The signer is either a
+        private key or a LogicSig.
+        :return:
+            The id of the first transaction in the group.
+        """
+        grouped_transactions = algo_txn.assign_group_id([txn for txn, _ in transactions])
+        signed_group = [NetworkInteraction._sign(txn, signer)
+                        for txn, (_, signer) in zip(grouped_transactions, transactions)]
+
+        return client.send_transactions(signed_group)
+
+    @staticmethod
+    def _sign(transaction: Transaction, signer: Union[str, algo_txn.LogicSig]):
+        if isinstance(signer, algo_txn.LogicSig):
+            return algo_txn.LogicSigTransaction(transaction, signer)
+
+        return transaction.sign(signer)
+
+    @staticmethod
+    def compile_programs(client: algod.AlgodClient, source_codes: List[str]) -> List[bytes]:
         """
+        Compiles multiple TEAL sources concurrently, so the algod round-trips of the sources that are not cached
+        overlap.
+        :param client: algorand client
+        :param source_codes: teal source codes
+        :return:
+            Decoded byte programs in the same order as the source codes.
+        """
+        with ThreadPoolExecutor(max_workers=len(source_codes)) as executor:
+            return list(executor.map(lambda source_code: NetworkInteraction.compile_program(client, source_code),
+                                     source_codes))
+
+    @staticmethod
+    def compile_program(client: algod.AlgodClient, source_code, cache: bool = True):
+        """
+        Compiles the TEAL source code using the algod node. Already compiled sources are served from memory or from
+        the on-disk cache, where the byte programs are keyed on the SHA-256 of the TEAL source.
         :param client: algorand client
         :param source_code: teal source code
+        :param cache: whether the compiled program is served from and stored in the caches. Programs that are compiled
+        only once, like the escrow of a single game, should not be cached since they would never be reused.
         :return:
             Decoded byte program
         """
-        compile_response = client.compile(source_code)
-        return base64.b64decode(compile_response['result'])
+        if not cache:
+            compile_response = client.compile(source_code)
+            return base64.b64decode(compile_response['result'])
+
+        program_bytes = NetworkInteraction._compiled_programs.get(source_code)
+        if program_bytes is not None:
+            return program_bytes
+
+        source_hash = hashlib.sha256(source_code.encode()).hexdigest()
+        program_path = Path(TEAL_CACHE_PATH) / f"{source_hash}.bin"
+
+        if program_path.exists():
+            program_bytes = program_path.read_bytes()
+        else:
+            compile_response = client.compile(source_code)
+            program_bytes = base64.b64decode(compile_response['result'])
+            write_cache_file(program_path, program_bytes)
+
+        NetworkInteraction._compiled_programs[source_code] = program_bytes
+        return program_bytes
+
+
+class TransactionNotConfirmedError(Exception):
+    """
+    Raised when a submitted transaction is rejected from the transaction pool, is not confirmed until its last valid
+    round or its status can not be retrieved from the node.
+    """
+
+
+class ConfirmationPoller:
+    """
+    Tracks submitted transactions from a single background thread. Instead of polling on a fixed interval, the thread
+    long-polls the node for the next block and checks the tracked transactions once per new round, which is the only
+    time their status can change. Every tracked transaction gets a future which is resolved with the pending
+    transaction info once the transaction is confirmed, or fails with a TransactionNotConfirmedError.
+    """
+
+    def __init__(self, client: algod.AlgodClient):
+        self.client = client
+        self.outstanding: Dict[str, Tuple[Future, Optional[int]]] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def track(self, txid: str, last_valid: Optional[int] = None) -> Future:
+        """
+        Starts tracking the transaction with the given id.
+        :param txid:
+        :param last_valid: the last valid round of the transaction. The transaction is no longer awaited once this
+        round has passed without it being confirmed.
+        :return:
+            Future that resolves with the pending transaction info of the confirmed transaction.
+        """
+        with self._lock:
+            future, _ = self.outstanding.get(txid, (None, None))
+            if future is None:
+                future = Future()
+                self.outstanding[txid] = (future, last_valid)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll, daemon=True)
+                self._thread.start()
+
+        return future
+
+    def _poll(self):
+        try:
+            last_round = self.client.status().get('last-round')
+        except Exception as e:
+            self._fail_outstanding(e)
+            return
+
+        while True:
+            with self._lock:
+                if not self.outstanding:
+                    self._thread = None
+                    return
+                pending = list(self.outstanding.items())
+
+            for txid, (future, last_valid) in pending:
+                try:
+                    txinfo = self.client.pending_transaction_info(txid)
+                except Exception as e:
+                    self._resolve(txid).set_exception(self._not_confirmed_error(txid, str(e), cause=e))
+                    continue
+
+                if txinfo.get('confirmed-round') and txinfo.get('confirmed-round') > 0:
+                    self._resolve(txid).set_result(txinfo)
+                elif txinfo.get('pool-error'):
+                    self._resolve(txid).set_exception(self._not_confirmed_error(txid, txinfo.get('pool-error')))
+                elif last_valid is not None and last_round >= last_valid:
+                    self._resolve(txid).set_exception(
+                        self._not_confirmed_error(txid, f"its last valid round {last_valid} has passed"))
+
+            with self._lock:
+                if not self.outstanding:
+                    continue
+
+            try:
+                last_round = self.client.status_after_block(last_round).get('last-round')
+            except Exception as e:
+                self._fail_outstanding(e)
+                return
+
+    def _resolve(self, txid: str) -> Future:
+        with self._lock:
+            future, _ = self.outstanding.pop(txid)
+            return future
+
+    def _fail_outstanding(self, exception: Exception):
+        with self._lock:
+            outstanding, self.outstanding = self.outstanding, {}
+            self._thread = None
+
+        for txid, (future, _) in outstanding.items():
+            future.set_exception(self._not_confirmed_error(txid, str(exception), cause=exception))
+
+    @staticmethod
+    def _not_confirmed_error(txid: str, reason: str, cause: Optional[Exception] = None) -> TransactionNotConfirmedError:
+        error = TransactionNotConfirmedError(f"Transaction {txid} was not confirmed: {reason}")
+        error.__cause__ = cause
+        return error
@@ -34,7 +34,9 @@ class ApplicationTransactionRepository:
                            global_schema: algo_txn.StateSchema,
                            local_schema: algo_txn.StateSchema,
                            app_args: Optional[List[Any]],
-                           sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                           sign_transaction: bool = True,
+                           suggested_params: Optional[algo_txn.SuggestedParams] = None) \
+            -> Union[Transaction, SignedTransaction]:
         """
         Initiates a transaction that represents application creation. The transaction is optionally signed using the
         provided private key.
@@ -46,11 +48,14 @@ class ApplicationTransactionRepository:
         :param local_schema: local schema for the application.
         :param app_args: list of arguments for the application.
         :param sign_transaction: boolean value that determines whether the created transaction should be signed or not.
+        :param suggested_params: suggested params fetched ahead of time. They are fetched from the network when not
+        provided.
         :return:
             Returns SignedTransaction or Transaction depending on the boolean property sign_transaction.
         """
         creator_address = algo_acc.address_from_private_key(private_key=creator_private_key)
-        suggested_params = get_default_suggested_params(client=client)
+        if suggested_params is None:
+            suggested_params = get_default_suggested_params(client=client)
 
         txn = algo_txn.ApplicationCreateTxn(sender=creator_address,
                                             sp=suggested_params,
@@ -73,7 +78,9 @@ class ApplicationTransactionRepository:
                          app_id: int,
                          on_complete: algo_txn.OnComplete,
                          app_args: Optional[List[Any]] = None,
-                         sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                         sign_transaction: bool = True,
+                         suggested_params: Optional[algo_txn.SuggestedParams] = None) \
+            -> Union[Transaction, SignedTransaction]:
         """
         Creates a transaction that represents an application call.
         :param client: algorand client.
@@ -82,11 +89,14 @@ class ApplicationTransactionRepository:
         :param on_complete: Type of the application call.
         :param app_args: Arguments of the application.
         :param sign_transaction: boolean value that determines whether the created transaction should be signed or not.
+        :param suggested_params: suggested params shared between the transactions of a group. They are fetched from
+        the network when not provided.
         :return:
         Returns SignedTransaction or Transaction depending on the boolean property sign_transaction.
         """
         caller_address = algo_acc.address_from_private_key(private_key=caller_private_key)
-        suggested_params = get_default_suggested_params(client=client)
+        if suggested_params is None:
+            suggested_params = get_default_suggested_params(client=client)
 
         txn = algo_txn.ApplicationCallTxn(sender=caller_address,
                                           sp=suggested_params,
@@ -327,7 +337,8 @@ class PaymentTransactionRepository:
                 receiver_address: str,
                 amount: int,
                 sender_private_key: Optional[str],
-                sign_transaction: bool = True) -> Union[Transaction, SignedTransaction]:
+                sign_transaction: bool = True,
+                suggested_params: Optional[algo_txn.SuggestedParams] = None) -> Union[Transaction, SignedTransaction]:
         """
         Creates a payment transaction in ALGOs.
         :param client:
@@ -336,9 +347,12 @@ class PaymentTransactionRepository:
         :param amount:
         :param sender_private_key:
         :param sign_transaction:
+        :param suggested_params: suggested params shared between the transactions of a group. They are fetched from
+        the network when not provided.
         :return:
         """
-        suggested_params = get_default_suggested_params(client=client)
+        if suggested_params is None:
+            suggested_params = get_default_suggested_params(client=client)
 
         txn = algo_txn.PaymentTxn(sender=sender_address,
                                   sp=suggested_params,
@@ -0,0 +1,45 @@
+from typing import Callable, List, Tuple
+
+from algosdk.v2client import algod
+
+from src.blockchain_utils.credentials import get_client, get_account
+from src.services.game_engine_service import GameEngineService
+
+
+def run_scenario(app_creator_id: int,
+                 game_actions: List[Tuple[str, int]],
+                 finish_game: Callable[[GameEngineService, algod.AlgodClient], None],
+                 player_x_id: int = 1,
+                 player_o_id: int = 2) -> GameEngineService:
+    """
+    Plays a whole Tic-Tac-Toe game on the network with the accounts from the config file. The client, the accounts and
+    the compiled programs are shared between all the scenarios that are run in the same process.
+    :param app_creator_id: number of the account that deploys the application.
+    :param game_actions: list of (player_id, action_position) pairs in the order in which they are played.
+    :param finish_game: function that receives the game engine and the client, and refunds the money.
+    :param player_x_id: number of the account of the Player X.
+    :param player_o_id: number of the account of the Player O.
+    :return:
+    """
+    client = get_client()
+
+    app_creator = get_account(account_id=app_creator_id)
+    player_x = get_account(account_id=player_x_id)
+    player_o = get_account(account_id=player_o_id)
+
+    game_engine = GameEngineService(app_creator_pk=app_creator.private_key,
+                                    app_creator_address=app_creator.address,
+                                    player_x_pk=player_x.private_key,
+                                    player_x_address=player_x.address,
+                                    player_o_pk=player_o.private_key,
+                                    player_o_address=player_o.address)
+
+    game_engine.deploy_application(client=client)
+    game_engine.start_game(client=client, with_escrow_funding=True)
+
+    game_engine.play_actions(client=client,
+                             actions=game_actions)
+
+    finish_game(game_engine, client)
+
+    return game_engine
@@ -1,12 +1,124 @@
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, MutableSequence, Optional, Tuple
+from urllib.error import URLError
+
 from algosdk import logic as algo_logic
+from algosdk.error import AlgodHTTPError
 from algosdk.future import transaction as algo_txn
 from pyteal import compileTeal, Mode
 
-from src.blockchain_utils.network_interaction import NetworkInteraction
-from src.blockchain_utils.transaction_repository import ApplicationTransactionRepository, PaymentTransactionRepository
-from src.smart_contracts.game_funds_escrow import game_funds_escorw
+from src.blockchain_utils.network_interaction import NetworkInteraction, ConfirmationPoller, TEAL_CACHE_PATH, \
+    write_cache_file
+from src.blockchain_utils.transaction_repository import ApplicationTransactionRepository, \
+    PaymentTransactionRepository, get_default_suggested_params
+from src.smart_contracts import game_funds_escrow, tic_tac_toe_asc1
+from src.smart_contracts.build import load_compiled_program, load_compiled_bytecode, source_module_hash
+from src.smart_contracts.game_funds_escrow import game_funds_escorw_template, APP_ID_TEMPLATE
 from src.smart_contracts.tic_tac_toe_asc1 import approval_program, clear_program, AppVariables
 
+# Already encoded application arguments of every application call, so they are not encoded on each transaction. The
+# position of a move fits in a single byte, which the smart contract decodes with btoi.
+SETUP_PLAYERS_APP_ARGS = [b"SetupPlayers"]
+ACTION_MOVE_APP_ARGS = tuple([b"ActionMove", action_position.to_bytes(1, "big")] for action_position in range(9))
+MONEY_REFUND_APP_ARGS = [b"MoneyRefund"]
+
+# The deployment transaction is valid only for a few rounds, so a deployment that is reported as failed because it was
+# not confirmed in time can not be confirmed afterwards.
+DEPLOYMENT_VALIDITY_ROUNDS = 4
+
+# Prefetched suggested params older than this are fetched again, so the transactions stay well within the validity
+# window of the params.
+PREFETCHED_PARAMS_MAX_AGE_SECONDS = 60
+
+# The suggested params for the next action are fetched on this executor while the current action is confirmed. It is
+# shared between all the engines, so the number of prefetching threads does not grow with the number of games.
+SUGGESTED_PARAMS_PREFETCH_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+
+def load_or_compile_teal(program_name: str, source_module, compile_program) -> str:
+    """
+    Loads the TEAL source of a program from the on-disk cache, compiling and storing it on a miss. The cache entry is
+    keyed on the hash of the PyTeal module that defines the program, the same way the precompiled programs are
+    checked, so editing the smart contract invalidates it.
+    :param program_name: unique name of the program, including its parameters.
+    :param source_module: the module in which the PyTeal program is defined.
+    :param compile_program: function that compiles the PyTeal program to TEAL.
+    :return:
+    """
+    teal_path = Path(TEAL_CACHE_PATH) / f"{program_name}_{source_module_hash(source_module)}.teal"
+
+    if teal_path.exists():
+        return teal_path.read_text()
+
+    teal_source = compile_program()
+    write_cache_file(teal_path, teal_source.encode())
+
+    return teal_source
+
+
+@functools.lru_cache(maxsize=None)
+def compile_approval_program(teal_version: int) -> str:
+    """
+    Compiles the approval program of the Tic-Tac-Toe application to TEAL. The precompiled program shipped with the
+    package is used when it is up to date with the smart contract. The result is memoized since the PyTeal source
+    is deterministic for a given TEAL version.
+    :param teal_version:
+    :return:
+    """
+    return load_compiled_program("approval", teal_version) or \
+        load_or_compile_teal(program_name=f"approval_v{teal_version}",
+                             source_module=tic_tac_toe_asc1,
+                             compile_program=lambda: compileTeal(approval_program(),
+                                                                 mode=Mode.Application,
+                                                                 version=teal_version,
+                                                                 assembleConstants=True))
+
+
+@functools.lru_cache(maxsize=None)
+def compile_clear_program(teal_version: int) -> str:
+    """
+    Compiles the clear program of the Tic-Tac-Toe application to TEAL.
+    :param teal_version:
+    :return:
+    """
+    return load_compiled_program("clear", teal_version) or \
+        load_or_compile_teal(program_name=f"clear_v{teal_version}",
+                             source_module=tic_tac_toe_asc1,
+                             compile_program=lambda: compileTeal(clear_program(),
+                                                                 mode=Mode.Application,
+                                                                 version=teal_version,
+                                                                 assembleConstants=True))
+
+
+@functools.lru_cache(maxsize=None)
+def compile_escrow_template(teal_version: int) -> str:
+    """
+    Compiles the escrow program template, which has a placeholder instead of the application id, to TEAL.
+    :param teal_version:
+    :return:
+    """
+    return load_compiled_program("escrow", teal_version) or \
+        load_or_compile_teal(program_name=f"escrow_v{teal_version}",
+                             source_module=game_funds_escrow,
+                             compile_program=lambda: compileTeal(game_funds_escorw_template(),
+                                                                 mode=Mode.Signature,
+                                                                 version=teal_version,
+                                                                 assembleConstants=True))
+
+
+def compile_escrow_program(app_id: int, teal_version: int) -> str:
+    """
+    Compiles the escrow program bound to the application with the given app_id to TEAL by filling in the compiled
+    escrow template.
+    :param app_id:
+    :param teal_version:
+    :return:
+    """
+    return compile_escrow_template(teal_version=teal_version).replace(APP_ID_TEMPLATE, str(app_id))
+
 
 class GameEngineService:
     """
@@ -28,12 +140,21 @@ class GameEngineService:
         self.player_o_address = player_o_address
         self.teal_version = 4
 
-        self.approval_program_code = approval_program()
-        self.clear_program_code = clear_program()
+        self.player_private_keys = {"X": player_x_pk, "O": player_o_pk}
+        self.player_addresses = {"X": player_x_address, "O": player_o_address}
+
+        # TEAL sources of the application programs, shared between all the engines through the compilation caches.
+        self.approval_program_code = compile_approval_program(teal_version=self.teal_version)
+        self.clear_program_code = compile_clear_program(teal_version=self.teal_version)
 
         self.app_id = None
         self.escrow_fund_address = None
         self.escrow_fund_program_bytes = None
+        self.escrow_fund_logic_sig = None
+
+        self.confirmation_poller = None
+
+        self.prefetched_suggested_params = None
 
     def deploy_application(self, client):
         """
@@ -41,19 +162,22 @@ class GameEngineService:
         :param client:
         :return:
         """
-        approval_program_compiled = compileTeal(approval_program(),
-                                                mode=Mode.Application,
-                                                version=self.teal_version)
+        approval_program_bytes = load_compiled_bytecode("approval", self.teal_version)
+        clear_program_bytes = load_compiled_bytecode("clear", self.teal_version)
+
+        # The suggested params do not depend on the programs, so they are fetched while the programs are compiled.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            suggested_params_future = executor.submit(get_default_suggested_params, client=client)
 
-        clear_program_compiled = compileTeal(clear_program(),
-                                             mode=Mode.Application,
-                                             version=self.teal_version)
+            if approval_program_bytes is None or clear_program_bytes is None:
+                approval_program_bytes, clear_program_bytes = \
+                    NetworkInteraction.compile_programs(client=client,
+                                                        source_codes=[self.approval_program_code,
+                                                                      self.clear_program_code])
 
-        approval_program_bytes = NetworkInteraction.compile_program(client=client,
-                                                                    source_code=approval_program_compiled)
+            suggested_params = suggested_params_future.result()
 
-        clear_program_bytes = NetworkInteraction.compile_program(client=client,
-                                                                 source_code=clear_program_compiled)
+        suggested_params.last = suggested_params.first + DEPLOYMENT_VALIDITY_ROUNDS
 
         global_schema = algo_txn.StateSchema(num_uints=AppVariables.number_of_int(),
                                              num_byte_slices=AppVariables.number_of_str())
@@ -67,26 +191,32 @@ class GameEngineService:
                                                                               clear_program=clear_program_bytes,
                                                                               global_schema=global_schema,
                                                                               local_schema=local_schema,
-                                                                              app_args=None)
+                                                                              app_args=None,
+                                                                              suggested_params=suggested_params)
 
-        tx_id = NetworkInteraction.submit_transaction(client,
-                                                      transaction=app_transaction,
-                                                      log=False)
+        tx_id = NetworkInteraction.submit_transaction_async(client,
+                                                            transaction=app_transaction)
 
-        transaction_response = client.pending_transaction_info(tx_id)
+        transaction_response, = self._await_txids(client,
+                                                  tx_ids=[tx_id],
+                                                  last_valid=app_transaction.transaction.last_valid_round)
 
         self.app_id = transaction_response['application-index']
         print(f"Tic-Tac-Toe application deployed with the application_id: {self.app_id}")
 
         return f"Tic-Tac-Toe application deployed with the application_id: {self.app_id}"
 
-    def start_game(self, client):
+    def start_game(self, client, with_escrow_funding: bool = False):
         """
         Atomic transfer of 3 transactions:
         - 1. Application call
         - 2. Payment from the Player X address to the Escrow fund address
         - 3. Payment from the Player O address to the Escrow fund address
+        Optionally a 4th transaction that funds the escrow address for the refund transaction fees is added to the
+        same group, which saves the separate funding submission. The application checks only the first 3 transactions
+        of the group.
         :param client:
+        :param with_escrow_funding: whether the escrow funding should be part of the Atomic Transfer.
         :return:
         """
         if self.app_id is None:
@@ -95,118 +225,204 @@ class GameEngineService:
         if self.escrow_fund_address is not None or self.escrow_fund_program_bytes is not None:
             raise ValueError('The game has already started!')
 
-        escrow_fund_program_compiled = compileTeal(game_funds_escorw(app_id=self.app_id),
-                                                   mode=Mode.Signature,
-                                                   version=self.teal_version)
+        escrow_fund_program_compiled = compile_escrow_program(app_id=self.app_id,
+                                                              teal_version=self.teal_version)
+
+        # The escrow compilation is a round-trip to the algod node, the application call does not depend on it so it
+        # is built in the meantime.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            escrow_fund_program_future = executor.submit(NetworkInteraction.compile_program,
+                                                         client=client,
+                                                         source_code=escrow_fund_program_compiled,
+                                                         cache=False)
 
-        self.escrow_fund_program_bytes = NetworkInteraction.compile_program(client=client,
-                                                                            source_code=escrow_fund_program_compiled)
+            # The suggested params are fetched once and shared between all the transactions in the group.
+            suggested_params = get_default_suggested_params(client=client)
+
+            app_initialization_txn = \
+                ApplicationTransactionRepository.call_application(client=client,
+                                                                  caller_private_key=self.app_creator_pk,
+                                                                  app_id=self.app_id,
+                                                                  on_complete=algo_txn.OnComplete.NoOpOC,
+                                                                  app_args=SETUP_PLAYERS_APP_ARGS,
+                                                                  sign_transaction=False,
+                                                                  suggested_params=suggested_params)
+
+            self.escrow_fund_program_bytes = escrow_fund_program_future.result()
 
         self.escrow_fund_address = algo_logic.address(self.escrow_fund_program_bytes)
+        self.escrow_fund_logic_sig = algo_txn.LogicSig(self.escrow_fund_program_bytes)
 
         player_x_funding_txn = PaymentTransactionRepository.payment(client=client,
                                                                     sender_address=self.player_x_address,
                                                                     receiver_address=self.escrow_fund_address,
                                                                     amount=1000000,
                                                                     sender_private_key=None,
-                                                                    sign_transaction=False)
+                                                                    sign_transaction=False,
+                                                                    suggested_params=suggested_params)
 
         player_o_funding_txn = PaymentTransactionRepository.payment(client=client,
                                                                     sender_address=self.player_o_address,
                                                                     receiver_address=self.escrow_fund_address,
                                                                     amount=1000000,
                                                                     sender_private_key=None,
-                                                                    sign_transaction=False)
+                                                                    sign_transaction=False,
+                                                                    suggested_params=suggested_params)
 
-        app_args = [
-            "SetupPlayers"
+        start_game_transactions = [
+            (app_initialization_txn, self.app_creator_pk),
+            (player_x_funding_txn, self.player_x_pk),
+            (player_o_funding_txn, self.player_o_pk)
         ]
 
-        app_initialization_txn = \
-            ApplicationTransactionRepository.call_application(client=client,
-                                                              caller_private_key=self.app_creator_pk,
-                                                              app_id=self.app_id,
-                                                              on_complete=algo_txn.OnComplete.NoOpOC,
-                                                              app_args=app_args,
-                                                              sign_transaction=False)
-
-        gid = algo_txn.calculate_group_id([app_initialization_txn,
-                                           player_x_funding_txn,
-                                           player_o_funding_txn])
-
-        app_initialization_txn.group = gid
-        player_x_funding_txn.group = gid
-        player_o_funding_txn.group = gid
+        if with_escrow_funding:
+            fund_escrow_txn = self._fund_escrow_transaction(client,
+                                                            sign_transaction=False,
+                                                            suggested_params=suggested_params)
+            start_game_transactions.append((fund_escrow_txn, self.app_creator_pk))
 
-        app_initialization_txn_signed = app_initialization_txn.sign(self.app_creator_pk)
-        player_x_funding_txn_signed = player_x_funding_txn.sign(self.player_x_pk)
-        player_o_funding_txn_signed = player_o_funding_txn.sign(self.player_o_pk)
-
-        signed_group = [app_initialization_txn_signed,
-                        player_x_funding_txn_signed,
-                        player_o_funding_txn_signed]
-
-        txid = client.send_transactions(signed_group)
+        txid = NetworkInteraction.submit_atomic_group(client, start_game_transactions)
+        self._prefetch_suggested_params(client)
 
         print(f"Game started with the transaction_id: {txid}")
 
         return f"Game started with the transaction_id: {txid}"
 
-    def play_action(self, client, player_id: str, action_position: int):
+    def play_action(self,
+                    client,
+                    player_id: str,
+                    action_position: int,
+                    suggested_params: Optional[algo_txn.SuggestedParams] = None):
         """
         Application call transaction that performs an action for the specified player at the specified action position.
         :param client:
         :param player_id: "X" or "O"
         :param action_position: action position in the range of [0, 8]
+        :param suggested_params: suggested params shared between multiple actions. They are fetched from the network
+        when not provided.
         :return:
         """
-        if player_id != "X" and player_id != "O":
-            raise ValueError('Invalid player id! The player_id should be X or O.')
+        player_pk = self._player_private_key(player_id)
+
+        if not 0 <= action_position <= 8:
+            raise ValueError('Invalid action position! The action_position should be in the range of [0, 8].')
 
         if self.app_id is None:
             raise ValueError('The application has not been deployed')
 
-        app_args = [
-            "ActionMove",
-            action_position]
-
-        player_pk = self.player_x_pk if player_id == "X" else self.player_o_pk
+        if suggested_params is None:
+            suggested_params = self._take_prefetched_suggested_params(client)
 
         app_initialization_txn = \
             ApplicationTransactionRepository.call_application(client=client,
                                                               caller_private_key=player_pk,
                                                               app_id=self.app_id,
                                                               on_complete=algo_txn.OnComplete.NoOpOC,
-                                                              app_args=app_args)
+                                                              app_args=ACTION_MOVE_APP_ARGS[action_position],
+                                                              suggested_params=suggested_params)
 
-        tx_id = NetworkInteraction.submit_transaction(client,
-                                                      transaction=app_initialization_txn,
-                                                      log=False)
+        tx_id = NetworkInteraction.submit_transaction_async(client,
+                                                            transaction=app_initialization_txn)
+        self._prefetch_suggested_params(client)
+        self._await_txids(client, tx_ids=[tx_id], last_valid=suggested_params.last)
 
         print(f"{player_id} has been put at position {action_position} in transaction with id: {tx_id}")
 
         return f"{player_id} has been put at position {action_position} in transaction with id: {tx_id}"
 
+    def play_actions(self, client, actions: List[Tuple[str, int]]) -> List[str]:
+        """
+        Performs a sequence of actions without waiting for the confirmation of each of them. The actions can not be
+        grouped into an Atomic Transfer because the application accepts an action only as a single transaction, so
+        they are submitted back to back in order and the transaction pool evaluates each of them on top of the
+        previous ones. Since every action requires the turn set by the previous one, only the confirmation of the last
+        action is awaited.
+        :param client:
+        :param actions: list of (player_id, action_position) pairs in the order in which they are played.
+        :return:
+        """
+        signing_keys = [self._player_private_key(player_id) for player_id, _ in actions]
+
+        if any(not 0 <= action_position <= 8 for _, action_position in actions):
+            raise ValueError('Invalid action position! The action_position should be in the range of [0, 8].')
+
+        if self.app_id is None:
+            raise ValueError('The application has not been deployed')
+
+        suggested_params = self._take_prefetched_suggested_params(client)
+
+        actions_log = []
+        tx_id = None
+        for (player_id, action_position), player_pk in zip(actions, signing_keys):
+            action_txn = \
+                ApplicationTransactionRepository.call_application(client=client,
+                                                                  caller_private_key=player_pk,
+                                                                  app_id=self.app_id,
+                                                                  on_complete=algo_txn.OnComplete.NoOpOC,
+                                                                  app_args=ACTION_MOVE_APP_ARGS[action_position],
+                                                                  suggested_params=suggested_params)
+
+            tx_id = NetworkInteraction.submit_transaction_async(client, transaction=action_txn)
+
+            actions_log.append(f"{player_id} has been put at position {action_position} "
+                               f"in transaction with id: {tx_id}")
+
+        if tx_id is not None:
+            self._await_txids(client, tx_ids=[tx_id], last_valid=suggested_params.last)
+
+        print("\n".join(actions_log))
+
+        return actions_log
+
     def fund_escrow(self, client):
         """
         Funding the escrow address in order to handle the transactions fees for refunding.
         :param client:
         :return:
         """
-        fund_escrow_txn = PaymentTransactionRepository.payment(client=client,
-                                                               sender_address=self.app_creator_address,
-                                                               receiver_address=self.escrow_fund_address,
-                                                               amount=1000000,
-                                                               sender_private_key=self.app_creator_pk,
-                                                               sign_transaction=True)
+        fund_escrow_txn = self._fund_escrow_transaction(client)
 
-        tx_id = NetworkInteraction.submit_transaction(client,
-                                                      transaction=fund_escrow_txn,
-                                                      log=False)
+        tx_id = NetworkInteraction.submit_transaction_async(client,
+                                                            transaction=fund_escrow_txn)
+        self._await_txids(client, tx_ids=[tx_id], last_valid=fund_escrow_txn.transaction.last_valid_round)
 
         print(f'Escrow address has been funded in transaction with id: {tx_id}')
         return f'Escrow address has been funded in transaction with id: {tx_id}'
 
+    def fund_and_refund(self,
+                        client,
+                        player_id: Optional[str] = None,
+                        txn_logs: Optional[MutableSequence[str]] = None) -> MutableSequence[str]:
+        """
+        Funds the escrow and refunds the money right after it, without waiting for the funding to be confirmed in
+        between. The transaction pool already accounts for the pending funding, so both submissions end up being
+        confirmed in the same block. The funding can not be part of the refund Atomic Transfer, because the escrow
+        and the application expect the refund payments on fixed positions in the group.
+        :param client:
+        :param player_id: "X" or "O" for a winner refund, None for a tie refund.
+        :param txn_logs: the log of every submitted transaction is appended to it as soon as the transaction is
+        submitted, so the funding is logged even when the refund fails afterwards.
+        :return:
+            The txn_logs with the funding and the refund log appended.
+        """
+        if txn_logs is None:
+            txn_logs = []
+
+        fund_escrow_txn = self._fund_escrow_transaction(client)
+        tx_id = NetworkInteraction.submit_transaction_async(client,
+                                                            transaction=fund_escrow_txn)
+
+        fund_escrow_txn_log = f'Escrow address has been funded in transaction with id: {tx_id}'
+        print(fund_escrow_txn_log)
+        txn_logs.append(fund_escrow_txn_log)
+
+        if player_id is None:
+            txn_logs.append(self.tie_money_refund(client))
+        else:
+            txn_logs.append(self.win_money_refund(client, player_id=player_id))
+
+        return txn_logs
+
     def win_money_refund(self, client, player_id: str):
         """
         Atomic transfer of 2 transactions:
@@ -216,49 +432,31 @@ class GameEngineService:
         :param player_id: "X" or "O".
         :return:
         """
-        if player_id != "X" and player_id != "O":
-            raise ValueError('Invalid player id! The player_id should be X or O.')
+        player_pk = self._player_private_key(player_id)
+        player_address = self.player_addresses[player_id]
 
         if self.app_id is None:
             raise ValueError('The application has not been deployed')
 
-        player_pk = self.player_x_pk if player_id == "X" else self.player_o_pk
-        player_address = self.player_x_address if player_id == "X" else self.player_o_address
-
-        app_args = [
-            "MoneyRefund"
-        ]
+        suggested_params = get_default_suggested_params(client=client)
 
         app_withdraw_call_txn = \
             ApplicationTransactionRepository.call_application(client=client,
                                                               caller_private_key=player_pk,
                                                               app_id=self.app_id,
                                                               on_complete=algo_txn.OnComplete.NoOpOC,
-                                                              app_args=app_args,
-                                                              sign_transaction=False)
-
-        refund_txn = PaymentTransactionRepository.payment(client=client,
-                                                          sender_address=self.escrow_fund_address,
-                                                          receiver_address=player_address,
-                                                          amount=2000000,
-                                                          sender_private_key=None,
-                                                          sign_transaction=False)
-
-        gid = algo_txn.calculate_group_id([app_withdraw_call_txn,
-                                           refund_txn])
-
-        app_withdraw_call_txn.group = gid
-        refund_txn.group = gid
+                                                              app_args=MONEY_REFUND_APP_ARGS,
+                                                              sign_transaction=False,
+                                                              suggested_params=suggested_params)
 
-        app_withdraw_call_txn_signed = app_withdraw_call_txn.sign(player_pk)
+        refund_txn = self._escrow_payment(receiver_address=player_address,
+                                          amount=2000000,
+                                          suggested_params=suggested_params)
 
-        refund_txn_logic_signature = algo_txn.LogicSig(self.escrow_fund_program_bytes)
-        refund_txn_signed = algo_txn.LogicSigTransaction(refund_txn, refund_txn_logic_signature)
-
-        signed_group = [app_withdraw_call_txn_signed,
-                        refund_txn_signed]
-
-        txid = client.send_transactions(signed_group)
+        txid = NetworkInteraction.submit_atomic_group(client, [
+            (app_withdraw_call_txn, player_pk),
+            (refund_txn, self.escrow_fund_logic_sig)
+        ])
 
         print(f"The winning money have been refunded to the player {player_id} in the transaction with id: {txid}")
         return f"The winning money have been refunded to the player {player_id} in the transaction with id: {txid}"
@@ -275,56 +473,101 @@ class GameEngineService:
         if self.app_id is None:
             raise ValueError('The application has not been deployed')
 
-        app_args = [
-            "MoneyRefund"
-        ]
+        suggested_params = get_default_suggested_params(client=client)
 
         app_withdraw_call_txn = \
             ApplicationTransactionRepository.call_application(client=client,
                                                               caller_private_key=self.app_creator_pk,
                                                               app_id=self.app_id,
                                                               on_complete=algo_txn.OnComplete.NoOpOC,
-                                                              app_args=app_args,
-                                                              sign_transaction=False)
+                                                              app_args=MONEY_REFUND_APP_ARGS,
+                                                              sign_transaction=False,
+                                                              suggested_params=suggested_params)
 
-        refund_player_x_txn = PaymentTransactionRepository.payment(client=client,
-                                                                   sender_address=self.escrow_fund_address,
-                                                                   receiver_address=self.player_x_address,
-                                                                   amount=1000000,
-                                                                   sender_private_key=None,
-                                                                   sign_transaction=False)
+        refund_player_x_txn = self._escrow_payment(receiver_address=self.player_x_address,
+                                                   amount=1000000,
+                                                   suggested_params=suggested_params)
 
-        refund_player_o_txn = PaymentTransactionRepository.payment(client=client,
-                                                                   sender_address=self.escrow_fund_address,
-                                                                   receiver_address=self.player_o_address,
-                                                                   amount=1000000,
-                                                                   sender_private_key=None,
-                                                                   sign_transaction=False)
+        refund_player_o_txn = self._escrow_payment(receiver_address=self.player_o_address,
+                                                   amount=1000000,
+                                                   suggested_params=suggested_params)
 
-        gid = algo_txn.calculate_group_id([app_withdraw_call_txn,
-                                           refund_player_x_txn,
-                                           refund_player_o_txn])
+        txid = NetworkInteraction.submit_atomic_group(client, [
+            (app_withdraw_call_txn, self.app_creator_pk),
+            (refund_player_x_txn, self.escrow_fund_logic_sig),
+            (refund_player_o_txn, self.escrow_fund_logic_sig)
+        ])
 
-        app_withdraw_call_txn.group = gid
-        refund_player_x_txn.group = gid
-        refund_player_o_txn.group = gid
+        print(f"The initial bet money have been refunded to the players in the transaction with id: {txid}")
 
-        app_withdraw_call_txn_signed = app_withdraw_call_txn.sign(self.app_creator_pk)
+        return f"The initial bet money have been refunded to the players in the transaction with id: {txid}"
 
-        refund_player_x_txn_logic_signature = algo_txn.LogicSig(self.escrow_fund_program_bytes)
-        refund_player_x_txn_signed = \
-            algo_txn.LogicSigTransaction(refund_player_x_txn, refund_player_x_txn_logic_signature)
+    def _player_private_key(self, player_id: str) -> str:
+        try:
+            return self.player_private_keys[player_id]
+        except KeyError:
+            raise ValueError('Invalid player id! The player_id should be X or O.') from None
 
-        refund_player_o_txn_logic_signature = algo_txn.LogicSig(self.escrow_fund_program_bytes)
-        refund_player_o_txn_signed = \
-            algo_txn.LogicSigTransaction(refund_player_o_txn, refund_player_o_txn_logic_signature)
+    def _prefetch_suggested_params(self, client):
+        """
+        Fetches the suggested params for the next action in the background, while the submitted transaction is being
+        confirmed.
+        :param client:
+        :return:
+        """
+        suggested_params_future = SUGGESTED_PARAMS_PREFETCH_EXECUTOR.submit(get_default_suggested_params, client=client)
+        self.prefetched_suggested_params = (time.monotonic(), suggested_params_future)
 
-        signed_group = [app_withdraw_call_txn_signed,
-                        refund_player_x_txn_signed,
-                        refund_player_o_txn_signed]
+    def _take_prefetched_suggested_params(self, client) -> algo_txn.SuggestedParams:
+        prefetched_suggested_params, self.prefetched_suggested_params = self.prefetched_suggested_params, None
 
-        txid = client.send_transactions(signed_group)
+        if prefetched_suggested_params is not None:
+            fetched_at, suggested_params_future = prefetched_suggested_params
+            if time.monotonic() - fetched_at < PREFETCHED_PARAMS_MAX_AGE_SECONDS:
+                try:
+                    return suggested_params_future.result()
+                except (AlgodHTTPError, URLError) as e:
+                    print(f"Prefetching the suggested params failed, they are fetched again: {e}")
 
-        print(f"The initial bet money have been refunded to the players in the transaction with id: {txid}")
+        return get_default_suggested_params(client=client)
 
-        return f"The initial bet money have been refunded to the players in the transaction with id: {txid}"
+    def _get_confirmation_poller(self, client) -> ConfirmationPoller:
+        if self.confirmation_poller is None:
+            self.confirmation_poller = ConfirmationPoller(client)
+
+        return self.confirmation_poller
+
+    def _await_txids(self, client, tx_ids: List[str], last_valid: Optional[int] = None) -> List[dict]:
+        """
+        Waits for the confirmation of all the transactions through the confirmation poller of the engine, so every
+        wait is served by the same block following loop.
+        :param client:
+        :param tx_ids:
+        :param last_valid: the last valid round of the transactions, after which they are no longer awaited.
+        :return:
+            The pending transaction infos of the confirmed transactions.
+        """
+        confirmations = [self._get_confirmation_poller(client).track(tx_id, last_valid=last_valid)
+                         for tx_id in tx_ids]
+        return [confirmation.result() for confirmation in confirmations]
+
+    def _escrow_payment(self, receiver_address: str, amount: int, suggested_params: algo_txn.SuggestedParams):
+        return PaymentTransactionRepository.payment(client=None,
+                                                    sender_address=self.escrow_fund_address,
+                                                    receiver_address=receiver_address,
+                                                    amount=amount,
+                                                    sender_private_key=None,
+                                                    sign_transaction=False,
+                                                    suggested_params=suggested_params)
+
+    def _fund_escrow_transaction(self,
+                                 client,
+                                 sign_transaction: bool = True,
+                                 suggested_params: Optional[algo_txn.SuggestedParams] = None):
+        return PaymentTransactionRepository.payment(client=client,
+                                                    sender_address=self.app_creator_address,
+                                                    receiver_address=self.escrow_fund_address,
+                                                    amount=1000000,
+                                                    sender_private_key=self.app_creator_pk,
+                                                    sign_transaction=sign_transaction,
+                                                    suggested_params=suggested_params)
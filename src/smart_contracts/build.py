@@ -0,0 +1,146 @@
+import argparse
+import base64
+import hashlib
+import os
+import pkgutil
+import sys
+from types import ModuleType
+from typing import Optional
+
+from algosdk.v2client import algod
+from pyteal import compileTeal, Mode
+
+from src.smart_contracts.game_funds_escrow import game_funds_escorw_template
+from src.smart_contracts.tic_tac_toe_asc1 import approval_program, clear_program
+
+COMPILED_PROGRAMS_PATH = os.path.join(os.path.dirname(__file__), 'compiled')
+TEAL_VERSION = 4
+
+PROGRAMS = {
+    "approval": (approval_program, Mode.Application),
+    "clear": (clear_program, Mode.Application),
+    "escrow": (game_funds_escorw_template, Mode.Signature),
+}
+
+# The escrow is a template whose bytecode depends on the application id, so only these programs are assembled at build
+# time.
+BYTECODE_PROGRAMS = ("approval", "clear")
+
+# Every compiled TEAL program ends with a comment that records the hash of the PyTeal module it was compiled from, so
+# a program that was not rebuilt after a change of its smart contract is detected and not used.
+SOURCE_HASH_COMMENT = "// source sha256: "
+
+
+def source_module_hash(source_module: ModuleType) -> str:
+    """
+    Hashes the source file of the module in which a PyTeal program is defined.
+    :param source_module:
+    :return:
+        The hex SHA-256 of the source file.
+    """
+    with open(source_module.__file__, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def program_source_hash(program_name: str) -> str:
+    program, _ = PROGRAMS[program_name]
+    return source_module_hash(sys.modules[program.__module__])
+
+
+def compiled_program_file_name(program_name: str, teal_version: int) -> str:
+    return f"{program_name}_v{teal_version}.teal"
+
+
+def compiled_bytecode_file_name(program_name: str, teal_version: int) -> str:
+    return f"{program_name}_v{teal_version}.tok"
+
+
+def load_compiled_program(program_name: str, teal_version: int) -> Optional[str]:
+    """
+    Loads the precompiled TEAL source of the program that is shipped in the compiled directory of the package.
+    :param program_name: one of the keys in PROGRAMS.
+    :param teal_version:
+    :return:
+        The TEAL source or None if the program has not been built for the given TEAL version or its smart contract
+        has changed since it was built.
+    """
+    try:
+        compiled_program = pkgutil.get_data(__package__,
+                                            f"compiled/{compiled_program_file_name(program_name, teal_version)}")
+    except OSError:
+        return None
+
+    teal_source, _, source_hash_line = compiled_program.decode().rpartition("\n")
+    if source_hash_line != SOURCE_HASH_COMMENT + program_source_hash(program_name):
+        return None
+
+    return teal_source
+
+
+def load_compiled_bytecode(program_name: str, teal_version: int) -> Optional[bytes]:
+    """
+    Loads the assembled bytecode of the program that is shipped in the compiled directory of the package.
+    :param program_name: one of BYTECODE_PROGRAMS.
+    :param teal_version:
+    :return:
+        The bytecode or None if the program has not been assembled for the given TEAL version or its TEAL source is
+        out of date.
+    """
+    # The bytecode is always written together with the TEAL source, so it is up to date only when the source is.
+    if load_compiled_program(program_name, teal_version) is None:
+        return None
+
+    try:
+        return pkgutil.get_data(__package__, f"compiled/{compiled_bytecode_file_name(program_name, teal_version)}")
+    except OSError:
+        return None
+
+
+def build_programs(teal_version: int = TEAL_VERSION, client: Optional[algod.AlgodClient] = None):
+    """
+    Compiles all the PyTeal programs to TEAL and writes them to the compiled directory. This needs to be rerun every
+    time one of the smart contracts changes.
+    :param teal_version:
+    :param client: algorand client. When provided, the BYTECODE_PROGRAMS are also assembled by the algod node, otherwise
+    their previously assembled bytecode is removed since it no longer matches the TEAL source.
+    """
+    os.makedirs(COMPILED_PROGRAMS_PATH, exist_ok=True)
+
+    for program_name, (program, mode) in PROGRAMS.items():
+        # The repeated constants are assembled into the intcblock and bytecblock of the program, so every further use
+        # of a constant is a single byte reference.
+        teal_source = compileTeal(program(), mode=mode, version=teal_version, assembleConstants=True)
+
+        program_path = os.path.join(COMPILED_PROGRAMS_PATH, compiled_program_file_name(program_name, teal_version))
+        with open(program_path, 'w') as file:
+            file.write(f"{teal_source}\n{SOURCE_HASH_COMMENT}{program_source_hash(program_name)}")
+
+        print(f"{program_name} program written to {program_path}")
+
+        if program_name not in BYTECODE_PROGRAMS:
+            continue
+
+        bytecode_path = os.path.join(COMPILED_PROGRAMS_PATH, compiled_bytecode_file_name(program_name, teal_version))
+        if client is not None:
+            compile_response = client.compile(teal_source)
+            with open(bytecode_path, 'wb') as file:
+                file.write(base64.b64decode(compile_response['result']))
+
+            print(f"{program_name} bytecode written to {bytecode_path}")
+        elif os.path.exists(bytecode_path):
+            os.remove(bytecode_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds the precompiled smart contracts.")
+    parser.add_argument("--bytecode",
+                        action="store_true",
+                        help="also assemble the application programs using the algod node from config.yml")
+    args = parser.parse_args()
+
+    if args.bytecode:
+        from src.blockchain_utils.credentials import get_client
+
+        build_programs(client=get_client())
+    else:
+        build_programs()
@@ -1,23 +1,47 @@
 from pyteal import *
 
 
+@Subroutine(TealType.none)
+def check_refund_payment(txn_index):
+    """
+    Checks that the refund payment at the txn_index position in the group has a bounded fee and that it neither closes
+    nor rekeys the escrow account.
+    """
+    return Seq([
+        Assert(Gtxn[txn_index].fee() <= Int(1000)),
+        Assert(Gtxn[txn_index].asset_close_to() == Global.zero_address()),
+        Assert(Gtxn[txn_index].rekey_to() == Global.zero_address())
+    ])
+
+
+# Placeholder for the application id in the escrow template.
+APP_ID_TEMPLATE = "TMPL_APP_ID"
+
+
 def game_funds_escorw(app_id: int):
+    return game_funds_escrow_logic(Int(app_id))
+
+
+def game_funds_escorw_template():
+    """
+    The escrow program with a template placeholder instead of the application id. The compiled TEAL source is bound to
+    an application by replacing APP_ID_TEMPLATE with the application id, so PyTeal compiles the escrow only once.
+    :return:
+    """
+    return game_funds_escrow_logic(Tmpl.Int(APP_ID_TEMPLATE))
+
+
+def game_funds_escrow_logic(app_id: Expr):
 
     win_refund = Seq([
-        Assert(Gtxn[0].application_id() == Int(app_id)),
-        Assert(Gtxn[1].fee() <= Int(1000)),
-        Assert(Gtxn[1].asset_close_to() == Global.zero_address()),
-        Assert(Gtxn[1].rekey_to() == Global.zero_address())
+        Assert(Gtxn[0].application_id() == app_id),
+        check_refund_payment(Int(1))
     ])
 
     tie_refund = Seq([
-        Assert(Gtxn[0].application_id() == Int(app_id)),
-        Assert(Gtxn[1].fee() <= Int(1000)),
-        Assert(Gtxn[1].asset_close_to() == Global.zero_address()),
-        Assert(Gtxn[1].rekey_to() == Global.zero_address()),
-        Assert(Gtxn[2].fee() <= Int(1000)),
-        Assert(Gtxn[2].asset_close_to() == Global.zero_address()),
-        Assert(Gtxn[2].rekey_to() == Global.zero_address())
+        Assert(Gtxn[0].application_id() == app_id),
+        check_refund_payment(Int(1)),
+        check_refund_payment(Int(2))
     ])
 
     return Seq([
@@ -28,3 +52,9 @@ def game_funds_escorw(app_id: int):
         Return(Int(1))
     ])
 
+
+if __name__ == "__main__":
+    # Rebuilds the precompiled programs that are shipped with the package.
+    from src.smart_contracts.build import build_programs
+
+    build_programs()
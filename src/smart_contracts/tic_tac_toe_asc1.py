@@ -3,19 +3,20 @@ from pyteal import *
 
 class AppVariables:
     """
-    All the variables available in the global state of the application.
+    All the variables available in the global state of the application. The keys are a single byte long in order to
+    keep the program and the global state small.
     """
-    PlayerXState = Bytes("PlayerXState")
-    PlayerOState = Bytes("PlayerOState")
+    PlayerXState = Bytes("x")
+    PlayerOState = Bytes("o")
 
-    PlayerOAddress = Bytes("PlayerOAddress")
-    PlayerXAddress = Bytes("PlayerXAddress")
-    PlayerTurnAddress = Bytes("PlayerTurnAddress")
-    FundsEscrowAddress = Bytes("FundsEscrowAddress")
+    PlayerOAddress = Bytes("O")
+    PlayerXAddress = Bytes("X")
+    PlayerTurnAddress = Bytes("T")
+    FundsEscrowAddress = Bytes("F")
 
-    BetAmount = Bytes("BetAmount")
-    ActionTimeout = Bytes("ActionTimeout")
-    GameStatus = Bytes("GameState")
+    BetAmount = Bytes("B")
+    ActionTimeout = Bytes("A")
+    GameStatus = Bytes("S")
 
     @classmethod
     def number_of_int(cls):
@@ -49,6 +50,23 @@ class AppActions:
 WINING_STATES = [448, 56, 7, 292, 146, 73, 273, 84]
 
 
+def winning_states_bitmap() -> bytes:
+    """
+    Builds a 512-bit bitmap over all the possible 9-bit player states, where the bit at index state is set if the state
+    contains any of the winning states. TEAL indexes the bits of a byte array starting from the leftmost bit of the
+    first byte.
+    :return:
+    """
+    bitmap = bytearray(64)
+    for state in range(512):
+        if any(state & wining_state == wining_state for wining_state in WINING_STATES):
+            bitmap[state >> 3] |= 0x80 >> (state & 7)
+    return bytes(bitmap)
+
+
+WINING_STATES_BITMAP = winning_states_bitmap()
+
+
 def application_start():
     """
     This function represents the start of the application. Here we decide which action will be executed in the current
@@ -91,14 +109,10 @@ def initialize_players_logic():
     PlayerO address.
     :return:
     """
-    player_x_address = App.globalGetEx(Int(0), AppVariables.PlayerXAddress)
-    player_o_address = App.globalGetEx(Int(0), AppVariables.PlayerOAddress)
-
-    setup_failed = Seq([
-        Return(Int(0))
-    ])
-
-    setup_players = Seq([
+    # The action timeout is set only here and a missing integer global variable reads as 0, so it tells whether the
+    # players have already been set up without probing the address variables with app_global_get_ex.
+    return Seq([
+        Assert(App.globalGet(AppVariables.ActionTimeout) == Int(0)),
         Assert(Gtxn[1].type_enum() == TxnType.Payment),
         Assert(Gtxn[2].type_enum() == TxnType.Payment),
         Assert(Gtxn[1].receiver() == Gtxn[2].receiver()),
@@ -112,89 +126,103 @@ def initialize_players_logic():
         Return(Int(1))
     ])
 
-    return Seq([
-        player_x_address,
-        player_o_address,
-        If(Or(player_x_address.hasValue(), player_o_address.hasValue()), setup_failed, setup_players)
-    ])
-
 
 def has_player_won(state):
     """
     Checks whether the passed state as an argument is a winning state. There are 8 possible winning states in which
-    a specific pattern of bits needs to be activated.
+    a specific pattern of bits needs to be activated. Instead of comparing the state against every pattern, the result
+    is read from the precomputed bitmap of all the 512 possible states.
     :param state:
     :return:
     """
-    return If(Or(BitwiseAnd(state, Int(WINING_STATES[0])) == Int(WINING_STATES[0]),
-                 BitwiseAnd(state, Int(WINING_STATES[1])) == Int(WINING_STATES[1]),
-                 BitwiseAnd(state, Int(WINING_STATES[2])) == Int(WINING_STATES[2]),
-                 BitwiseAnd(state, Int(WINING_STATES[3])) == Int(WINING_STATES[3]),
-                 BitwiseAnd(state, Int(WINING_STATES[4])) == Int(WINING_STATES[4]),
-                 BitwiseAnd(state, Int(WINING_STATES[5])) == Int(WINING_STATES[5]),
-                 BitwiseAnd(state, Int(WINING_STATES[6])) == Int(WINING_STATES[6]),
-                 BitwiseAnd(state, Int(WINING_STATES[7])) == Int(WINING_STATES[7])), Int(1), Int(0))
+    return GetBit(Bytes("base16", WINING_STATES_BITMAP.hex()), state)
 
 
-def is_tie():
+def is_tie(state_x, state_o):
     """
     Checks whether the game has ended with a tie. Tie state is represented with the number 511 which is the number where
     the first 9 bits are active.
+    :param state_x:
+    :param state_o:
     :return:
     """
-    state_x = App.globalGet(AppVariables.PlayerXState)
-    state_o = App.globalGet(AppVariables.PlayerOState)
     return Int(511) == BitwiseOr(state_x, state_o)
 
 
 def play_action_logic():
     """
     Executes an action for the current player in the game and accordingly updates the state of the game. The action
-    is passed as an argument to the application call.
+    is passed as an argument to the application call. The global variables that are used more than once are loaded
+    into scratch space a single time, and the win and tie checks are done on the updated state in scratch space, so
+    every move writes the player state, the player turn and at most once the game status.
     :return:
     """
-    position_index = Btoi(Txn.application_args[1])
-
-    state_x = App.globalGet(AppVariables.PlayerXState)
-    state_o = App.globalGet(AppVariables.PlayerOState)
-
-    game_action = ShiftLeft(Int(1), position_index)
-
+    position_index = ScratchVar(TealType.uint64)
+    state_x = ScratchVar(TealType.uint64)
+    state_o = ScratchVar(TealType.uint64)
+    player_x_address = ScratchVar(TealType.bytes)
+    player_o_address = ScratchVar(TealType.bytes)
+    game_action = ScratchVar(TealType.uint64)
+    new_state = ScratchVar(TealType.uint64)
+
+    # A move that fills the board ends the game as a tie even if it is a winning one.
     player_x_move = Seq([
-        App.globalPut(AppVariables.PlayerXState, BitwiseOr(state_x, game_action)),
-
-        If(has_player_won(App.globalGet(AppVariables.PlayerXState)),
-           App.globalPut(AppVariables.GameStatus, Int(1))),
-
-        App.globalPut(AppVariables.PlayerTurnAddress, App.globalGet(AppVariables.PlayerOAddress)),
+        new_state.store(BitwiseOr(state_x.load(), game_action.load())),
+        App.globalPut(AppVariables.PlayerXState, new_state.load()),
+        App.globalPut(AppVariables.PlayerTurnAddress, player_o_address.load()),
+        If(is_tie(new_state.load(), state_o.load()),
+           App.globalPut(AppVariables.GameStatus, Int(3)),
+           If(has_player_won(new_state.load()),
+              App.globalPut(AppVariables.GameStatus, Int(1)))),
     ])
 
     player_o_move = Seq([
-        App.globalPut(AppVariables.PlayerOState, BitwiseOr(state_o, game_action)),
-
-        If(has_player_won(App.globalGet(AppVariables.PlayerOState)),
-           App.globalPut(AppVariables.GameStatus, Int(2))),
-
-        App.globalPut(AppVariables.PlayerTurnAddress, App.globalGet(AppVariables.PlayerXAddress)),
+        new_state.store(BitwiseOr(state_o.load(), game_action.load())),
+        App.globalPut(AppVariables.PlayerOState, new_state.load()),
+        App.globalPut(AppVariables.PlayerTurnAddress, player_x_address.load()),
+        If(is_tie(state_x.load(), new_state.load()),
+           App.globalPut(AppVariables.GameStatus, Int(3)),
+           If(has_player_won(new_state.load()),
+              App.globalPut(AppVariables.GameStatus, Int(2)))),
     ])
 
     return Seq([
-        Assert(position_index >= Int(0)),
-        Assert(position_index <= Int(8)),
+        position_index.store(Btoi(Txn.application_args[1])),
+        Assert(position_index.load() <= Int(8)),
         Assert(Global.latest_timestamp() <= App.globalGet(AppVariables.ActionTimeout)),
         Assert(App.globalGet(AppVariables.GameStatus) == DefaultValues.GameStatus),
         Assert(Txn.sender() == App.globalGet(AppVariables.PlayerTurnAddress)),
-        Assert(And(BitwiseAnd(state_x, game_action) == Int(0),
-                   BitwiseAnd(state_o, game_action) == Int(0))),
+        state_x.store(App.globalGet(AppVariables.PlayerXState)),
+        state_o.store(App.globalGet(AppVariables.PlayerOState)),
+        player_x_address.store(App.globalGet(AppVariables.PlayerXAddress)),
+        player_o_address.store(App.globalGet(AppVariables.PlayerOAddress)),
+        game_action.store(ShiftLeft(Int(1), position_index.load())),
+        Assert(BitwiseAnd(BitwiseOr(state_x.load(), state_o.load()), game_action.load()) == Int(0)),
         Cond(
-            [Txn.sender() == App.globalGet(AppVariables.PlayerXAddress), player_x_move],
-            [Txn.sender() == App.globalGet(AppVariables.PlayerOAddress), player_o_move],
+            [Txn.sender() == player_x_address.load(), player_x_move],
+            [Txn.sender() == player_o_address.load(), player_o_move],
         ),
-        If(is_tie(), App.globalPut(AppVariables.GameStatus, Int(3))),
         Return(Int(1))
     ])
 
 
+@Subroutine(TealType.none)
+def winner_withdraw(winner_address, winner_game_status, bet_amount):
+    """
+    Checks that the refund payment sends the whole bet amount of both players to the winner and records the winner in
+    the game status.
+    :param winner_address:
+    :param winner_game_status:
+    :param bet_amount:
+    :return:
+    """
+    return Seq([
+        Assert(Gtxn[1].receiver() == winner_address),
+        Assert(Gtxn[1].amount() == Int(2) * bet_amount),
+        App.globalPut(AppVariables.GameStatus, winner_game_status)
+    ])
+
+
 def money_refund_logic():
     """
     This function handles the logic for refunding the money in case of a winner, tie or timeout termination. If the
@@ -209,53 +237,57 @@ def money_refund_logic():
     1. Application Call with the appropriate application action argument.
     2. Payment from the Escrow to the PlayerX's Address with a amount equal to the BetAmount.
     3. Payment from the Escrow to the PlayerO's Address with a amount equal to the BetAmount.
+    The game status, the player turn address, the bet amount and the escrow address are loaded into scratch space once
+    and reused by all the conditions. The conditions are checked in the order of how the games usually end, and the
+    timeout is checked only once for both players after every finished game status has been ruled out.
     :return:
     """
-    has_x_won_by_playing = App.globalGet(AppVariables.GameStatus) == Int(1)
-    has_o_won_by_playing = App.globalGet(AppVariables.GameStatus) == Int(2)
+    game_status = ScratchVar(TealType.uint64)
+    player_turn_address = ScratchVar(TealType.bytes)
+    bet_amount = ScratchVar(TealType.uint64)
+    funds_escrow_address = ScratchVar(TealType.bytes)
 
-    has_x_won_by_timeout = And(App.globalGet(AppVariables.GameStatus) == Int(0),
-                               Global.latest_timestamp() > App.globalGet(AppVariables.ActionTimeout),
-                               App.globalGet(AppVariables.PlayerTurnAddress) == App.globalGet(
-                                   AppVariables.PlayerOAddress))
+    has_x_won_by_playing = game_status.load() == Int(1)
+    has_o_won_by_playing = game_status.load() == Int(2)
+    game_is_tie = game_status.load() == Int(3)
 
-    has_o_won_by_timeout = And(App.globalGet(AppVariables.GameStatus) == Int(0),
-                               Global.latest_timestamp() > App.globalGet(AppVariables.ActionTimeout),
-                               App.globalGet(AppVariables.PlayerTurnAddress) == App.globalGet(
-                                   AppVariables.PlayerXAddress))
+    has_game_timed_out = And(game_status.load() == Int(0),
+                             Global.latest_timestamp() > App.globalGet(AppVariables.ActionTimeout))
 
-    has_x_won = Or(has_x_won_by_playing, has_x_won_by_timeout)
-    has_o_won = Or(has_o_won_by_playing, has_o_won_by_timeout)
-    game_is_tie = App.globalGet(AppVariables.GameStatus) == Int(3)
+    # The player who was supposed to make the next move loses the game.
+    has_x_won_by_timeout = player_turn_address.load() == App.globalGet(AppVariables.PlayerOAddress)
+    has_o_won_by_timeout = player_turn_address.load() == App.globalGet(AppVariables.PlayerXAddress)
 
-    x_withdraw = Seq([
-        Assert(Gtxn[1].receiver() == App.globalGet(AppVariables.PlayerXAddress)),
-        Assert(Gtxn[1].amount() == Int(2) * App.globalGet(AppVariables.BetAmount)),
-        App.globalPut(AppVariables.GameStatus, Int(1))
-    ])
+    x_withdraw = winner_withdraw(App.globalGet(AppVariables.PlayerXAddress), Int(1), bet_amount.load())
 
-    o_withdraw = Seq([
-        Assert(Gtxn[1].receiver() == App.globalGet(AppVariables.PlayerOAddress)),
-        Assert(Gtxn[1].amount() == Int(2) * App.globalGet(AppVariables.BetAmount)),
-        App.globalPut(AppVariables.GameStatus, Int(2))
-    ])
+    o_withdraw = winner_withdraw(App.globalGet(AppVariables.PlayerOAddress), Int(2), bet_amount.load())
 
     tie_withdraw = Seq([
         Assert(Gtxn[1].receiver() == App.globalGet(AppVariables.PlayerXAddress)),
-        Assert(Gtxn[1].amount() == App.globalGet(AppVariables.BetAmount)),
+        Assert(Gtxn[1].amount() == bet_amount.load()),
         Assert(Gtxn[2].type_enum() == TxnType.Payment),
-        Assert(Gtxn[2].sender() == App.globalGet(AppVariables.FundsEscrowAddress)),
+        Assert(Gtxn[2].sender() == funds_escrow_address.load()),
         Assert(Gtxn[2].receiver() == App.globalGet(AppVariables.PlayerOAddress)),
-        Assert(Gtxn[2].amount() == App.globalGet(AppVariables.BetAmount))
+        Assert(Gtxn[2].amount() == bet_amount.load())
     ])
 
+    timeout_withdraw = Cond(
+        [has_x_won_by_timeout, x_withdraw],
+        [has_o_won_by_timeout, o_withdraw]
+    )
+
     return Seq([
         Assert(Gtxn[1].type_enum() == TxnType.Payment),
-        Assert(Gtxn[1].sender() == App.globalGet(AppVariables.FundsEscrowAddress)),
+        funds_escrow_address.store(App.globalGet(AppVariables.FundsEscrowAddress)),
+        Assert(Gtxn[1].sender() == funds_escrow_address.load()),
+        game_status.store(App.globalGet(AppVariables.GameStatus)),
+        player_turn_address.store(App.globalGet(AppVariables.PlayerTurnAddress)),
+        bet_amount.store(App.globalGet(AppVariables.BetAmount)),
         Cond(
-            [has_x_won, x_withdraw],
-            [has_o_won, o_withdraw],
-            [game_is_tie, tie_withdraw]
+            [has_x_won_by_playing, x_withdraw],
+            [has_o_won_by_playing, o_withdraw],
+            [game_is_tie, tie_withdraw],
+            [has_game_timed_out, timeout_withdraw]
         ),
         Return(Int(1))
     ])
@@ -267,3 +299,10 @@ def approval_program():
 
 def clear_program():
     return Return(Int(1))
+
+
+if __name__ == "__main__":
+    # Rebuilds the precompiled programs that are shipped with the package.
+    from src.smart_contracts.build import build_programs
+
+    build_programs()
@@ -1,36 +1,18 @@
-from src.blockchain_utils.credentials import get_client, get_account_credentials
-from src.services.game_engine_service import GameEngineService
-
-client = get_client()
-
-acc_pk, acc_address, _ = get_account_credentials(account_id=3)
-player_x_pk, player_x_address, _ = get_account_credentials(account_id=1)
-player_o_pk, player_o_address, _ = get_account_credentials(account_id=2)
-
-game_engine = GameEngineService(app_creator_pk=acc_pk,
-                                app_creator_address=acc_address,
-                                player_x_pk=player_x_pk,
-                                player_x_address=player_x_address,
-                                player_o_pk=player_o_pk,
-                                player_o_address=player_o_address)
-
-game_engine.deploy_application(client=client)
-game_engine.start_game(client=client)
+from src.scenarios.runner import run_scenario
 
+# Player X does not make a move after the last action of Player O, so Player O wins once the game duration of 1 hour
+# has passed. Wait 1 hour after the start of the game before the refund in finish_game, otherwise it is rejected.
 game_actions = [
     ("X", 0),
     ("O", 2),
 ]
 
-for player_id, action_position in game_actions:
-    game_engine.play_action(client=client,
-                            player_id=player_id,
-                            action_position=action_position)
-
 
-# Wait 1 hour.
+def finish_game(game_engine, client):
+    game_engine.win_money_refund(client=client,
+                                 player_id="O")
 
-game_engine.fund_escrow(client=client)
-game_engine.win_money_refund(client=client,
-                             player_id="O")
 
+run_scenario(app_creator_id=3,
+             game_actions=game_actions,
+             finish_game=finish_game)